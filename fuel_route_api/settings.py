@@ -74,18 +74,56 @@ WSGI_APPLICATION = 'fuel_route_api.wsgi.application'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Connections are kept open across requests (CONN_MAX_AGE) so station and
+# plan reads don't pay connection setup each time. Set DB_ENGINE=postgres to
+# use a local Postgres instead of SQLite.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'fuel_route'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=5000;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
-}
 
 
 SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('VITE_SUPABASE_ANON_KEY')
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
 
+# Preload station data, price aggregates and upstream clients in
+# RoutingConfig.ready() so a new worker's first request doesn't pay for them.
+ROUTING_WARMUP = os.getenv('ROUTING_WARMUP', 'false').lower() in ('1', 'true', 'yes')
+
+# How often (seconds) a worker checks whether imported stations or the price
+# index changed; on change it reloads them and drops cached plans. 0 checks on
+# every request.
+STATION_DATA_CHECK_SECONDS = float(os.getenv('STATION_DATA_CHECK_SECONDS', '30'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
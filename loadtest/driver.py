@@ -0,0 +1,133 @@
+"""Closed-loop load driver for the route API.
+
+Runs a fixed number of workers per concurrency level for a fixed time and
+reports throughput and latency percentiles, e.g.:
+
+    python -m loadtest.driver --url http://127.0.0.1:8000/api/calculate-route/ \
+        --concurrency 1,8,32 --duration 20 --label wsgi
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROUTES_PATH = os.path.join(os.path.dirname(__file__), "routes.json")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(int(math.ceil(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def _worker(url, method, next_body, deadline, cold, counter, results):
+    session = requests.Session()
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        body = dict(next_body())
+        if cold:
+            # Unique start/end strings bypass the server-side route and plan caches.
+            n = next(counter)
+            body["start"] = f"{body['start']} #{n}"
+            body["end"] = f"{body['end']} #{n}"
+        started = time.perf_counter()
+        try:
+            if method == "GET":
+                response = session.get(url, timeout=60)
+            else:
+                response = session.post(url, json=body, timeout=60)
+            response.content
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    results.append((latencies, errors))
+
+
+def run_level(url, method, routes, concurrency, duration, warmup, cold, extra):
+    lock = threading.Lock()
+    cycle = itertools.cycle([{**r, **extra} for r in routes])
+
+    def next_body():
+        with lock:
+            return next(cycle)
+
+    counter = itertools.count()
+    if warmup > 0:
+        _run(url, method, next_body, concurrency, warmup, cold, counter)
+    started = time.perf_counter()
+    results = _run(url, method, next_body, concurrency, duration, cold, counter)
+    wall = time.perf_counter() - started
+
+    latencies = sorted(l for worker_latencies, _ in results for l in worker_latencies)
+    errors = sum(e for _, e in results)
+    to_ms = lambda v: round(v * 1000.0, 1) if v is not None else None
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+    }
+
+
+def _run(url, method, next_body, concurrency, duration, cold, counter):
+    deadline = time.perf_counter() + duration
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_worker, url, method, next_body, deadline, cold, counter, results)
+            for _ in range(concurrency)
+        ]
+    # Re-raise anything other than a request failure instead of silently losing a worker.
+    for future in futures:
+        future.result()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure RPS and latency percentiles for the route API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/calculate-route/")
+    parser.add_argument("--method", default="POST", choices=["GET", "POST"])
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--routes", default=ROUTES_PATH, help="JSON list of request bodies")
+    parser.add_argument("--cold", action="store_true", help="Make every request miss the server caches")
+    parser.add_argument("--body", default="{}", help="JSON merged into every request body")
+    parser.add_argument("--label", default="", help="Tag for this run, e.g. wsgi or asgi")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args(argv)
+
+    with open(args.routes) as f:
+        routes = json.load(f)
+    extra = json.loads(args.body)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    if not args.json:
+        print(f"{'label':<8} {'conc':>5} {'reqs':>7} {'errs':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in levels:
+        row = run_level(args.url, args.method, routes, concurrency, args.duration, args.warmup, args.cold, extra)
+        row["label"] = args.label
+        if args.json:
+            print(json.dumps(row))
+        else:
+            print(f"{args.label:<8} {row['concurrency']:>5} {row['requests']:>7} {row['errors']:>5} "
+                  f"{row['rps']:>8} {row['p50_ms']!s:>8} {row['p95_ms']!s:>8} {row['p99_ms']!s:>8}")
+
+
+if __name__ == "__main__":
+    main()
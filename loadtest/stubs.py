@@ -0,0 +1,203 @@
+"""Local OSRM + Nominatim stand-in for load tests.
+
+Serves saved responses from the fixtures directory with configurable
+latency. The bundled nominatim.json is synthetic (hand-written city-centre
+points), not a recording. Point the API at it with:
+
+    OSRM_BASE_URL=http://127.0.0.1:5001 NOMINATIM_URL=http://127.0.0.1:5001
+
+Unknown OSRM routes are synthesized as a straight line between the two
+waypoints, unknown geocoder queries get a stable point inside the US. A
+trailing " #<n>" (added by the driver's --cold mode) is ignored, so cold
+requests geocode and route exactly like warm ones.
+With --record-osrm / --record-nominatim, misses are fetched from the real
+service once and saved as new fixtures.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+EARTH_RADIUS_M = 6371008.8
+SYNTH_POINT_SPACING_M = 800.0
+# loadtest.driver --cold appends " #<n>" to bust the API's caches.
+COLD_SUFFIX = re.compile(r"\s+#\d+$")
+
+_lock = threading.Lock()
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def synthesize_route(waypoints):
+    (lon1, lat1), (lon2, lat2) = waypoints[0], waypoints[-1]
+    straight_m = _haversine_m(lat1, lon1, lat2, lon2)
+    steps = max(int(straight_m / SYNTH_POINT_SPACING_M), 1)
+    coords = [
+        [round(lon1 + (lon2 - lon1) * i / steps, 6), round(lat1 + (lat2 - lat1) * i / steps, 6)]
+        for i in range(steps + 1)
+    ]
+    # Roads are longer than the great circle; 1.2 is a typical detour factor.
+    distance = straight_m * 1.2
+    duration = distance / 27.0
+    return {
+        "code": "Ok",
+        "routes": [{
+            "geometry": {"type": "LineString", "coordinates": coords},
+            "legs": [{"steps": [], "summary": "", "weight": duration, "duration": duration, "distance": distance}],
+            "weight_name": "routability",
+            "weight": duration,
+            "duration": duration,
+            "distance": distance,
+        }],
+        "waypoints": [
+            {"hint": "", "distance": 0.0, "name": "", "location": list(waypoints[0])},
+            {"hint": "", "distance": 0.0, "name": "", "location": list(waypoints[-1])},
+        ],
+    }
+
+
+def synthesize_place(query):
+    # Stable pseudo-random point in the continental US for unrecorded queries.
+    rnd = random.Random(hashlib.sha1(query.encode("utf-8")).hexdigest())
+    lat = rnd.uniform(30.0, 47.0)
+    lon = rnd.uniform(-120.0, -75.0)
+    return [{
+        "place_id": rnd.randint(1, 10 ** 9),
+        "lat": f"{lat:.7f}",
+        "lon": f"{lon:.7f}",
+        "display_name": query,
+        "class": "place",
+        "type": "city",
+        "importance": 0.5,
+        "boundingbox": [f"{lat - 0.1:.7f}", f"{lat + 0.1:.7f}", f"{lon - 0.1:.7f}", f"{lon + 0.1:.7f}"],
+    }]
+
+
+class FixtureStore:
+
+    def __init__(self, root=FIXTURES_DIR, record_osrm=None, record_nominatim=None):
+        self.root = root
+        self.record_osrm = record_osrm
+        self.record_nominatim = record_nominatim
+        self.osrm_dir = os.path.join(root, "osrm")
+        self.nominatim_path = os.path.join(root, "nominatim.json")
+        os.makedirs(self.osrm_dir, exist_ok=True)
+        self.places = {}
+        if os.path.exists(self.nominatim_path):
+            with open(self.nominatim_path) as f:
+                self.places = json.load(f)
+        self.routes = {}
+
+    def _fetch(self, url):
+        request = urllib.request.Request(url, headers={"User-Agent": "location_api_loadtest"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+
+    def route(self, coords, query):
+        key = hashlib.sha1(coords.encode("utf-8")).hexdigest()[:16]
+        if key in self.routes:
+            return self.routes[key]
+        path = os.path.join(self.osrm_dir, f"{key}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+        elif self.record_osrm:
+            data = self._fetch(f"{self.record_osrm}/route/v1/driving/{coords}?{query}")
+            with _lock, open(path, "w") as f:
+                json.dump(data, f)
+        else:
+            # Synthesized routes are cheap to rebuild, so they aren't cached.
+            waypoints = [tuple(float(v) for v in pair.split(",")) for pair in coords.split(";")]
+            return synthesize_route(waypoints)
+        self.routes[key] = data
+        return data
+
+    def geocode(self, q):
+        q = COLD_SUFFIX.sub("", q.strip())
+        key = q.lower()
+        if key in self.places:
+            return self.places[key]
+        if self.record_nominatim:
+            data = self._fetch(f"{self.record_nominatim}/search?{urlencode({'q': q, 'format': 'json', 'limit': 1})}")
+            with _lock:
+                self.places[key] = data
+                with open(self.nominatim_path, "w") as f:
+                    json.dump(self.places, f, indent=2, sort_keys=True)
+            return data
+        return synthesize_place(q)
+
+
+def make_handler(store, latency_ms, jitter_ms):
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            url = urlsplit(self.path)
+            if url.path.startswith("/route/v1/driving/"):
+                coords = url.path[len("/route/v1/driving/"):]
+                self._send_json(store.route(coords, url.query))
+            elif url.path.rstrip("/") == "/search":
+                q = parse_qs(url.query).get("q", [""])[0]
+                self._send_json(store.geocode(q))
+            else:
+                self._send_json({"code": "NotFound", "message": self.path}, status=404)
+
+    return StubHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub OSRM and Nominatim servers for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Added delay per response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the delay")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--record-osrm", metavar="URL", help="Fetch and save missing routes from this OSRM")
+    parser.add_argument("--record-nominatim", metavar="URL", help="Fetch and save missing places from this Nominatim")
+    args = parser.parse_args(argv)
+
+    store = FixtureStore(args.fixtures, args.record_osrm, args.record_nominatim)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.latency_ms, args.jitter_ms))
+    server.daemon_threads = True
+    print(f"Stub OSRM/Nominatim on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms:g}ms +/- {args.jitter_ms:g}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import FuelStation
 
-# Register your models here.
+
+@admin.register(FuelStation)
+class FuelStationAdmin(admin.ModelAdmin):
+    list_display = ('station_name', 'city', 'state', 'fuel_price', 'last_updated')
+    list_filter = ('state',)
+    search_fields = ('station_name', 'city', 'zip_code')
@@ -1,6 +1,26 @@
+import warnings
 from django.apps import AppConfig
+from django.conf import settings
+from django.db import connections
 
 
 class RoutingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'routing'
+
+    def ready(self):
+        if not settings.ROUTING_WARMUP:
+            return
+        from .views import warm_up
+
+        # Reading fuel_stations here is deliberate, so silence Django's
+        # "database access during app initialization" warning.
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                'ignore',
+                message='Accessing the database during app initialization',
+                category=RuntimeWarning,
+            )
+            warm_up()
+        # Don't hand an open connection to workers forked after --preload.
+        connections.close_all()
@@ -1,11 +1,14 @@
 import math
 from typing import List, Dict
+from .vehicles import get_vehicle_profile
 
 class FuelOptimizer:
 
-    def __init__(self, max_range_miles=500, mpg=10):
-        self.max_range_miles = max_range_miles
-        self.mpg = mpg
+    def __init__(self, max_range_miles=None, mpg=None, profile=None):
+        profile = get_vehicle_profile(profile)
+        self.profile = profile
+        self.max_range_miles = profile.range_miles if max_range_miles is None else max_range_miles
+        self.mpg = profile.mpg if mpg is None else mpg
 
     def calculate_distance(self, lat1, lon1, lat2, lon2):
         R = 3959
@@ -36,7 +39,8 @@ class FuelOptimizer:
 
         return sorted(nearby, key=lambda x: (x['fuel_price'], x['distance_from_point']))
 
-    def optimize_fuel_stops(self, route_coordinates: List[Dict], fuel_stations: List[Dict], total_distance_miles: float):
+    def optimize_fuel_stops(self, route_coordinates: List[Dict], fuel_stations: List[Dict], total_distance_miles: float,
+                            price_index=None):
         if total_distance_miles <= self.max_range_miles:
             return [], 0
 
@@ -104,8 +108,11 @@ class FuelOptimizer:
                 total_cost += additional_cost
         else:
             total_gallons = total_distance_miles / self.mpg
-            if fuel_stations:
+            # Priced at the caller's index when given, else the stations passed in.
+            avg_price = price_index.national.mean if price_index is not None else None
+            if avg_price is None and fuel_stations:
                 avg_price = sum(float(s['fuel_price']) for s in fuel_stations) / len(fuel_stations)
+            if avg_price is not None:
                 total_cost = total_gallons * avg_price
 
         return fuel_stops, round(total_cost, 2)
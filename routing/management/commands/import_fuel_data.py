@@ -1,7 +1,9 @@
 from django.core.management.base import BaseCommand
 import csv
 import random
-from routing.supabase_client import bulk_insert_fuel_stations
+from django.db import transaction
+from routing.pricing import build_price_index, load_price_index, station_key, station_source_version
+from routing.models import FuelStation
 
 class Command(BaseCommand):
     help = 'Import fuel station data from CSV file'
@@ -30,10 +32,12 @@ class Command(BaseCommand):
                     stations.append(station)
 
             if stations:
-                bulk_insert_fuel_stations(stations)
+                index = load_price_index()
+                self.replace_stations(stations)
                 self.stdout.write(
                     self.style.SUCCESS(f'Successfully imported {len(stations)} fuel stations')
                 )
+                self.update_price_index(index, stations)
             else:
                 self.stdout.write(
                     self.style.WARNING('No stations found in CSV file')
@@ -47,3 +51,27 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.ERROR(f'Error importing data: {str(e)}')
             )
+
+    def replace_stations(self, stations):
+        # Re-imported stations replace their existing rows instead of duplicating them.
+        keys = {station_key(station) for station in stations}
+        existing = FuelStation.objects.values('id', 'station_name', 'address', 'zip_code', 'latitude', 'longitude')
+        stale_ids = [row['id'] for row in existing if station_key(row) in keys]
+        with transaction.atomic():
+            FuelStation.objects.filter(id__in=stale_ids).delete()
+            FuelStation.objects.bulk_create(
+                [FuelStation(**station) for station in stations], batch_size=1000
+            )
+
+    def update_price_index(self, index, stations):
+        # Stations are keyed, so re-imported stations replace their old price.
+        # An index built from the sample CSV can't be patched into a DB one.
+        if index.source_version and index.source_version[0] == 'db':
+            index.add_stations(stations)
+        else:
+            index = build_price_index()
+        index.source_version = station_source_version()
+        index.save()
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated price aggregates for {len(index.states)} states')
+        )
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+import json
+import os
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so nothing is already imported.
+PROBE = """
+import json, os, time
+os.environ['ROUTING_WARMUP'] = 'false'
+timings = {}
+t = time.perf_counter()
+import django
+django.setup()
+timings['django.setup'] = time.perf_counter() - t
+from django.conf import settings
+from importlib import import_module
+t = time.perf_counter()
+import_module(settings.ROOT_URLCONF)
+timings['import urlconf'] = time.perf_counter() - t
+if %(warm)r:
+    import warnings
+    warnings.filterwarnings('ignore', message='Accessing the database during app initialization',
+                            category=RuntimeWarning)
+    from routing import views
+    from routing.pricing import get_price_index
+    for name, step in [('station data', views.get_fuel_df), ('price index', get_price_index),
+                       ('http session', views.get_http_session), ('geolocator', views.get_geolocator)]:
+        t = time.perf_counter()
+        step()
+        timings['warm-up: ' + name] = time.perf_counter() - t
+print(json.dumps(timings))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Profile worker cold start: Django setup, URLconf import and the routing warm-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest top-level imports to list')
+        parser.add_argument('--no-warmup', action='store_true', help='Skip timing the warm-up steps')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'fuel_route_api.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE % {'warm': not options['no_warmup']}],
+            capture_output=True, text=True, env=env,
+        )
+        if result.returncode != 0:
+            self.stdout.write(self.style.ERROR(result.stderr.strip().splitlines()[-1]))
+            return
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        self.stdout.write(self.style.SUCCESS('Startup phases'))
+        for name, seconds in timings.items():
+            self.stdout.write(f'  {name:<28} {seconds * 1000:>9.1f} ms')
+
+        # -X importtime lines look like "import time: <self us> | <cumulative us> | <indented name>".
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative_us, name = line[len('import time:'):].split('|')
+            imports.append((int(cumulative_us), name[1:]))
+
+        top_level = sorted((i for i in imports if not i[1].startswith(' ')), reverse=True)
+        self.stdout.write(self.style.SUCCESS(f'Slowest top-level imports (of {len(imports)} modules)'))
+        for cumulative_us, name in top_level[:options['top']]:
+            self.stdout.write(f'  {name:<40} {cumulative_us / 1000:>9.1f} ms')
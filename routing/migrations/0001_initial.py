@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:18
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuelStation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('station_name', models.TextField(blank=True, default='')),
+                ('address', models.TextField(blank=True, default='')),
+                ('city', models.TextField()),
+                ('state', models.TextField()),
+                ('zip_code', models.TextField(blank=True, default='')),
+                ('latitude', models.DecimalField(decimal_places=7, max_digits=10)),
+                ('longitude', models.DecimalField(decimal_places=7, max_digits=10)),
+                ('fuel_price', models.DecimalField(decimal_places=3, max_digits=6)),
+                ('last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+            ],
+            options={
+                'db_table': 'fuel_stations',
+                'indexes': [models.Index(fields=['state'], name='idx_fuel_stations_state'), models.Index(fields=['latitude', 'longitude'], name='idx_fuel_stations_location'), models.Index(fields=['fuel_price'], name='idx_fuel_stations_price')],
+            },
+        ),
+    ]
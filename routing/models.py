@@ -1,3 +1,51 @@
-from django.db import models
+import uuid
+from django.db import DatabaseError, models
+from django.db.models import Count, Max, Sum
 
-# Create your models here.
+
+class FuelStation(models.Model):
+    # Mirrors the Supabase fuel_stations table (supabase/migrations).
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    station_name = models.TextField(default='', blank=True)
+    address = models.TextField(default='', blank=True)
+    city = models.TextField()
+    state = models.TextField()
+    zip_code = models.TextField(default='', blank=True)
+    latitude = models.DecimalField(max_digits=10, decimal_places=7)
+    longitude = models.DecimalField(max_digits=10, decimal_places=7)
+    fuel_price = models.DecimalField(max_digits=6, decimal_places=3)
+    last_updated = models.DateTimeField(auto_now=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+
+    class Meta:
+        db_table = 'fuel_stations'
+        indexes = [
+            models.Index(fields=['state'], name='idx_fuel_stations_state'),
+            models.Index(fields=['latitude', 'longitude'], name='idx_fuel_stations_location'),
+            models.Index(fields=['fuel_price'], name='idx_fuel_stations_price'),
+        ]
+
+    def __str__(self):
+        return f'{self.station_name} ({self.city}, {self.state})'
+
+
+def station_data_version():
+    # Changes whenever stations are imported, edited, replaced or deleted. The
+    # price sum also catches queryset.update(), which skips last_updated.
+    try:
+        stats = FuelStation.objects.aggregate(
+            count=Count('id'), latest=Max('last_updated'), prices=Sum('fuel_price')
+        )
+    except DatabaseError:
+        return None
+    latest = stats['latest'].isoformat() if stats['latest'] else None
+    return [stats['count'], latest, str(stats['prices'])]
+
+
+def station_rows(*fields):
+    # Empty when the table has no rows or hasn't been migrated yet, so callers
+    # can fall back to the sample CSV.
+    try:
+        return list(FuelStation.objects.values(*fields))
+    except DatabaseError:
+        return []
@@ -0,0 +1,285 @@
+import csv
+import json
+import math
+import os
+from bisect import bisect_left, insort
+from django.conf import settings
+from .models import station_data_version, station_rows
+
+PRICE_INDEX_PATH = os.path.join(settings.BASE_DIR, "fuel_price_index.json")
+FUEL_CSV = os.path.join(settings.BASE_DIR, "sample_fuel_prices.csv")
+GRID_CELL_DEGREES = 1.0
+MAX_CELL_RING = 3
+# Route miles with no priced grid cell nearby; charged at the national mean.
+UNASSIGNED = "unassigned"
+
+_PRICE_INDEX = None
+
+
+def station_key(station):
+    # Identifies a station across imports so a new price replaces the old one.
+    return "|".join([
+        str(station.get("station_name") or "").strip().lower(),
+        str(station.get("address") or "").strip().lower(),
+        str(station.get("zip_code") or "").strip(),
+        f"{float(station['latitude']):.5f}",
+        f"{float(station['longitude']):.5f}",
+    ])
+
+
+def grid_cell(lat, lon, cell_degrees=GRID_CELL_DEGREES):
+    return f"{math.floor(lat / cell_degrees)}:{math.floor(lon / cell_degrees)}"
+
+
+class PriceAggregate:
+
+    # Prices are kept sorted so percentiles stay exact as stations are added
+    # or replaced.
+    def __init__(self, prices=None, states=None):
+        self.prices = sorted(prices or [])
+        self.total = sum(self.prices)
+        self.states = dict(states or {})
+
+    def add(self, price, state=None):
+        insort(self.prices, price)
+        self.total += price
+        if state:
+            self.states[state] = self.states.get(state, 0) + 1
+
+    def remove(self, price, state=None):
+        idx = bisect_left(self.prices, price)
+        if idx == len(self.prices) or self.prices[idx] != price:
+            raise ValueError(f"Price {price} is not in this aggregate")
+        del self.prices[idx]
+        self.total = self.total - price if self.prices else 0.0
+        if state and state in self.states:
+            self.states[state] -= 1
+            if not self.states[state]:
+                del self.states[state]
+
+    @property
+    def count(self):
+        return len(self.prices)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def dominant_state(self):
+        return max(self.states, key=self.states.get) if self.states else None
+
+    def percentile(self, pct):
+        if not self.prices:
+            return None
+        pos = (len(self.prices) - 1) * pct / 100.0
+        lo, hi = math.floor(pos), math.ceil(pos)
+        return self.prices[lo] + (self.prices[hi] - self.prices[lo]) * (pos - lo)
+
+    def summary(self):
+        if not self.prices:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": self.prices[0],
+            "max": self.prices[-1],
+            "mean": round(self.mean, 3),
+            "p25": round(self.percentile(25), 3),
+            "p50": round(self.percentile(50), 3),
+            "p75": round(self.percentile(75), 3),
+            "p90": round(self.percentile(90), 3),
+        }
+
+    def to_dict(self):
+        return {"prices": self.prices, "states": self.states}
+
+
+class PriceIndex:
+
+    def __init__(self, cell_degrees=GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.national = PriceAggregate()
+        self.states = {}
+        self.cells = {}
+        self.stations = {}
+        self.source_version = None
+        self._cell_states = {}
+
+    def add_station(self, key, state, latitude, longitude, price):
+        if key in self.stations:
+            self.remove_station(key)
+        price = float(price)
+        state = (state or "").strip().upper()
+        cell = grid_cell(float(latitude), float(longitude), self.cell_degrees)
+        self.national.add(price, state)
+        if state:
+            self.states.setdefault(state, PriceAggregate()).add(price)
+        self.cells.setdefault(cell, PriceAggregate()).add(price, state)
+        self.stations[key] = [state, float(latitude), float(longitude), price]
+        self._cell_states.clear()
+
+    def remove_station(self, key):
+        state, latitude, longitude, price = self.stations.pop(key)
+        cell = grid_cell(latitude, longitude, self.cell_degrees)
+        self.national.remove(price, state)
+        for aggregates, name, agg_state in ((self.states, state, None), (self.cells, cell, state)):
+            if name in aggregates:
+                aggregates[name].remove(price, agg_state)
+                if not aggregates[name].count:
+                    del aggregates[name]
+        self._cell_states.clear()
+
+    def add_stations(self, stations):
+        for s in stations:
+            price = s.get("fuel_price", s.get("price_per_gallon"))
+            self.add_station(station_key(s), s.get("state"), s["latitude"], s["longitude"], price)
+
+    def state_mean(self, state):
+        agg = self.states.get(state)
+        if agg is not None and agg.count:
+            return agg.mean
+        return self.national.mean
+
+    def state_at(self, lat, lon):
+        # Nearest populated grid cell, searched in rings around the point.
+        row = math.floor(lat / self.cell_degrees)
+        col = math.floor(lon / self.cell_degrees)
+        if (row, col) not in self._cell_states:
+            self._cell_states[(row, col)] = self._nearest_cell_state(row, col)
+        return self._cell_states[(row, col)]
+
+    def _nearest_cell_state(self, row, col):
+        for ring in range(MAX_CELL_RING + 1):
+            best = None
+            for dr in range(-ring, ring + 1):
+                for dc in range(-ring, ring + 1):
+                    if max(abs(dr), abs(dc)) != ring:
+                        continue
+                    agg = self.cells.get(f"{row + dr}:{col + dc}")
+                    if agg is not None and (best is None or agg.count > best.count):
+                        best = agg
+            if best is not None:
+                return best.dominant_state
+        return None
+
+    def to_dict(self):
+        # Aggregates are rebuilt from the per-station prices on load.
+        return {
+            "cell_degrees": self.cell_degrees,
+            "source_version": self.source_version,
+            "stations": self.stations,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(cell_degrees=data.get("cell_degrees", GRID_CELL_DEGREES))
+        for key, (state, latitude, longitude, price) in data["stations"].items():
+            index.add_station(key, state, latitude, longitude, price)
+        index.source_version = data.get("source_version")
+        return index
+
+    def save(self, path=None):
+        path = path or PRICE_INDEX_PATH
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or PRICE_INDEX_PATH) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_csv(cls, path=None):
+        index = cls()
+        with open(path or FUEL_CSV, newline="") as f:
+            reader = csv.DictReader(f)
+            index.add_stations({k.strip(): v for k, v in row.items()} for row in reader)
+        return index
+
+
+def build_price_index():
+    # Same source order as views.load_fuel_df: imported stations, then the CSV.
+    rows = station_rows(
+        "station_name", "address", "zip_code", "state", "latitude", "longitude", "fuel_price"
+    )
+    if not rows:
+        return PriceIndex.from_csv()
+    index = PriceIndex()
+    index.add_stations(rows)
+    return index
+
+
+def station_source_version():
+    # Identifies the station data views.load_fuel_df would read right now.
+    version = station_data_version()
+    if version and version[0]:
+        return ["db", *version]
+    csv_mtime = os.stat(FUEL_CSV).st_mtime_ns if os.path.exists(FUEL_CSV) else None
+    return ["csv", csv_mtime]
+
+
+def load_price_index():
+    # The saved index is a cache of the station data; it is only used while
+    # it was built from the same data the views read, otherwise it's rebuilt.
+    version = station_source_version()
+    if os.path.exists(PRICE_INDEX_PATH):
+        index = PriceIndex.load()
+        if index.source_version == version:
+            return index
+    index = build_price_index()
+    index.source_version = version
+    try:
+        index.save()
+    except OSError:
+        pass
+    return index
+
+
+def reset_price_index():
+    global _PRICE_INDEX
+    _PRICE_INDEX = None
+
+
+def get_price_index():
+    global _PRICE_INDEX
+    if _PRICE_INDEX is None:
+        _PRICE_INDEX = load_price_index()
+    return _PRICE_INDEX
+
+
+def miles_by_state(route_points, price_index, haversine):
+    miles = {}
+    for (lat1, lon1), (lat2, lon2) in zip(route_points, route_points[1:]):
+        d = haversine(lat1, lon1, lat2, lon2)
+        state = price_index.state_at((lat1 + lat2) / 2, (lon1 + lon2) / 2) or UNASSIGNED
+        miles[state] = miles.get(state, 0.0) + d
+    return miles
+
+
+def estimate_trip_cost(route_points, distance_miles, profile, price_index, haversine):
+    if not price_index.national.count:
+        raise ValueError("No fuel prices available for estimate")
+    miles = miles_by_state(route_points, price_index, haversine)
+    # Scale segment miles to the routed distance so totals match OSRM.
+    measured = sum(miles.values()) or 1.0
+    scale = distance_miles / measured
+    breakdown = {}
+    total_cost = 0.0
+    for state, state_miles in sorted(miles.items(), key=lambda kv: -kv[1]):
+        state_miles *= scale
+        price = price_index.state_mean(state) if state != UNASSIGNED else price_index.national.mean
+        cost = state_miles * profile.gallons_per_mile * price
+        total_cost += cost
+        breakdown[state] = {
+            "miles": round(state_miles, 2),
+            "avg_price_per_gallon": round(price, 3),
+            "cost_usd": round(cost, 2),
+        }
+    return {
+        "vehicle": profile.name,
+        "total_gallons_needed": round(distance_miles * profile.gallons_per_mile, 2),
+        "estimated_cost_usd": round(total_cost, 2),
+        "by_state": breakdown,
+    }
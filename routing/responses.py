@@ -0,0 +1,115 @@
+import gzip
+import json
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GEOMETRY_FORMATS = ("preview", "polyline", "geojson", "none")
+PREVIEW_POINTS = 50
+POLYLINE_PRECISION = 5
+COMPRESS_MIN_BYTES = 1024
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(route_points, precision=POLYLINE_PRECISION):
+    # Inverse of MapsService.decode_polyline; points are (lat, lon) pairs.
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lng = 0
+    for lat, lng in route_points:
+        ilat = int(round(lat * factor))
+        ilng = int(round(lng * factor))
+        out.append(_encode_value(ilat - prev_lat))
+        out.append(_encode_value(ilng - prev_lng))
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(out)
+
+
+def to_geojson(route_points):
+    return {
+        "type": "LineString",
+        "coordinates": [[lon, lat] for lat, lon in route_points],
+    }
+
+
+def route_geometry(route_points, geometry="preview"):
+    if geometry == "preview":
+        return {"route_coordinates": route_points[:PREVIEW_POINTS]}
+    if geometry == "polyline":
+        return {
+            "route_polyline": encode_polyline(route_points),
+            "polyline_precision": POLYLINE_PRECISION,
+        }
+    if geometry == "geojson":
+        return {"route_geojson": to_geojson(route_points)}
+    return {}
+
+
+def _pick_encoding(accept_encoding):
+    qvalues = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    # Highest q wins; "*" covers codings not listed. On a tie prefer Brotli.
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = qvalues.get(coding, qvalues.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def route_json_response(request, payload, status=200):
+    body = dumps(payload)
+    encoding = _pick_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    compressed = encoding is not None and len(body) >= COMPRESS_MIN_BYTES
+    if compressed:
+        body = _compress(body, encoding)
+    response = HttpResponse(body, content_type="application/json", status=status)
+    if compressed:
+        response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(len(body))
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
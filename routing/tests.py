@@ -1,3 +1,353 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import pricing, views
+from .fuel_optimizer import FuelOptimizer
+from .maps_service import MapsService
+from .models import FuelStation
+from .pricing import PriceAggregate, PriceIndex, estimate_trip_cost
+from .responses import _pick_encoding, encode_polyline, route_json_response
+from .vehicles import get_vehicle_profile
+
+ROUTE_POINTS = [(40.7 + i * 0.01, -74.0 - i * 0.05) for i in range(400)]
+
+
+def fake_geocode(address):
+    return (40.7, -74.0) if address.startswith("New York") else (41.8, -87.6)
+
+
+class PolylineTests(SimpleTestCase):
+
+    def test_encode_matches_reference_polyline(self):
+        points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        self.assertEqual(encode_polyline(points), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+
+    def test_round_trip_through_decode(self):
+        decoded = MapsService.__new__(MapsService).decode_polyline(encode_polyline(ROUTE_POINTS))
+        self.assertEqual(len(decoded), len(ROUTE_POINTS))
+        for (lat, lng), point in zip(ROUTE_POINTS, decoded):
+            self.assertAlmostEqual(point["lat"], lat, places=5)
+            self.assertAlmostEqual(point["lng"], lng, places=5)
+
+
+class CompressionTests(SimpleTestCase):
+
+    def test_pick_encoding(self):
+        self.assertEqual(_pick_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(_pick_encoding("deflate;q=1.0, GZIP;q=0.5"), "gzip")
+        self.assertIsNone(_pick_encoding(""))
+        self.assertIsNone(_pick_encoding("identity"))
+        self.assertIsNone(_pick_encoding("gzip;q=0"))
+        self.assertIsNone(_pick_encoding("gzip;q=0.0"))
+        self.assertIsNone(_pick_encoding("gzip; q=0.000"))
+
+    def test_pick_encoding_ranks_q_values(self):
+        self.assertEqual(_pick_encoding("br;q=0.1, gzip;q=1.0"), "gzip")
+        self.assertEqual(_pick_encoding("gzip;q=0.5, br"), "br")
+        self.assertEqual(_pick_encoding("gzip, br"), "br")
+        self.assertEqual(_pick_encoding("*"), "br")
+        self.assertEqual(_pick_encoding("*;q=0.5, br;q=0"), "gzip")
+        self.assertIsNone(_pick_encoding("*;q=0"))
+        with mock.patch("routing.responses.brotli", None):
+            self.assertEqual(_pick_encoding("br, gzip;q=0.1"), "gzip")
+            self.assertIsNone(_pick_encoding("br"))
+
+    def test_large_payload_is_gzipped(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        payload = {"route_coordinates": ROUTE_POINTS}
+        response = route_json_response(request, payload)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(body["route_coordinates"]), len(ROUTE_POINTS))
+
+    def test_small_or_refused_payload_is_not_compressed(self):
+        small = route_json_response(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"), {"ok": True})
+        self.assertFalse(small.has_header("Content-Encoding"))
+        refused = route_json_response(
+            RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip;q=0.0"),
+            {"route_coordinates": ROUTE_POINTS},
+        )
+        self.assertFalse(refused.has_header("Content-Encoding"))
+        self.assertEqual(len(json.loads(refused.content)["route_coordinates"]), len(ROUTE_POINTS))
+
+
+@mock.patch.object(views, "call_osrm_route", return_value=(1300 * 1609.344, ROUTE_POINTS))
+@mock.patch.object(views, "geocode", side_effect=fake_geocode)
+class CalculateRouteTests(TestCase):
+
+    def setUp(self):
+        views._SIMPLE_CACHE.clear()
+        views._PLAN_CACHE.clear()
+
+    def post(self, **body):
+        body = {"start": "New York, NY", "end": "Chicago, IL", **body}
+        return self.client.post("/api/calculate-route/", json.dumps(body), content_type="application/json")
+
+    def test_rejects_unknown_geometry(self, geocode, osrm):
+        response = self.post(geometry="svg")
+        self.assertEqual(response.status_code, 400)
+        geocode.assert_not_called()
+
+    def test_geometry_formats(self, geocode, osrm):
+        self.assertEqual(len(self.post().json()["route_coordinates"]), 50)
+        polyline = self.post(geometry="polyline").json()
+        self.assertEqual(polyline["route_polyline"], encode_polyline(ROUTE_POINTS))
+        geojson = self.post(geometry="geojson").json()["route_geojson"]
+        self.assertEqual(geojson["type"], "LineString")
+        self.assertEqual(len(geojson["coordinates"]), len(ROUTE_POINTS))
+        bare = self.post(geometry="none").json()
+        self.assertNotIn("route_coordinates", bare)
+        self.assertNotIn("route_polyline", bare)
+
+    def test_vehicle_validation(self, geocode, osrm):
+        self.assertEqual(self.post(vehicle="tractor").status_code, 400)
+        self.assertEqual(self.post(vehicle={"a": 1}).status_code, 400)
+        self.assertEqual(self.post(vehicles=[]).status_code, 400)
+        self.assertEqual(self.post(vehicles="semi").status_code, 400)
+        self.assertEqual(self.post(vehicles=[{"a": 1}]).status_code, 400)
+        self.assertEqual(self.post(vehicles=["semi", "tractor"]).status_code, 400)
+        geocode.assert_not_called()
+
+    def test_multi_vehicle_plans_share_one_route(self, geocode, osrm):
+        body = self.post(vehicles=["box_truck", "semi"], geometry="none").json()
+        self.assertEqual(set(body["plans"]), {"box_truck", "semi"})
+        self.assertEqual(body["plans"]["semi"]["vehicle"], "semi")
+        self.assertEqual(osrm.call_count, 1)
+        self.assertEqual(self.post(vehicle="semi").json()["vehicle"], "semi")
+        self.assertEqual(osrm.call_count, 1)
+
+    def test_plan_cache_is_bounded(self, geocode, osrm):
+        with mock.patch.object(views, "PLAN_CACHE_SIZE", 2):
+            for city in ("Chicago, IL", "Denver, CO", "Boston, MA"):
+                self.post(end=city, geometry="none")
+            self.assertEqual(
+                list(views._PLAN_CACHE),
+                ["New York, NY|Denver, CO|default", "New York, NY|Boston, MA|default"],
+            )
+
+
+class PriceAggregateTests(SimpleTestCase):
+
+    def test_percentiles_and_summary(self):
+        agg = PriceAggregate([4.0, 3.0, 5.0, 6.0])
+        self.assertEqual(agg.percentile(0), 3.0)
+        self.assertEqual(agg.percentile(100), 6.0)
+        self.assertAlmostEqual(agg.percentile(50), 4.5)
+        summary = agg.summary()
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["min"], 3.0)
+        self.assertEqual(summary["mean"], 4.5)
+        self.assertEqual(summary["p25"], 3.75)
+        self.assertEqual(PriceAggregate().summary(), {"count": 0})
+
+    def test_remove(self):
+        agg = PriceAggregate()
+        agg.add(4.0, "CA")
+        agg.add(3.0, "NV")
+        agg.remove(4.0, "CA")
+        self.assertEqual(agg.prices, [3.0])
+        self.assertEqual(agg.mean, 3.0)
+        self.assertEqual(agg.states, {"NV": 1})
+        with self.assertRaises(ValueError):
+            agg.remove(9.0)
+
+
+class PriceIndexTests(SimpleTestCase):
+
+    station = {"station_name": "Shell", "address": "1 Main St", "zip_code": "90001",
+               "state": "CA", "latitude": 34.05, "longitude": -118.24, "fuel_price": 4.0}
+
+    def test_reimport_replaces_price(self):
+        index = PriceIndex()
+        index.add_stations([self.station])
+        index.add_stations([self.station])
+        self.assertEqual(index.national.count, 1)
+        index.add_stations([{**self.station, "fuel_price": 5.0}])
+        self.assertEqual(index.states["CA"].prices, [5.0])
+        self.assertEqual(index.national.summary()["mean"], 5.0)
+
+    def test_moving_station_empties_old_aggregates(self):
+        index = PriceIndex()
+        index.add_station("k", "CA", 34.05, -118.24, 4.0)
+        index.add_station("k", "NV", 36.17, -115.14, 3.5)
+        self.assertNotIn("CA", index.states)
+        self.assertEqual(len(index.cells), 1)
+        self.assertEqual(index.state_at(36.2, -115.1), "NV")
+
+    def test_round_trip(self):
+        index = PriceIndex.from_csv()
+        copy = PriceIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+        self.assertEqual(copy.national.summary(), index.national.summary())
+        self.assertEqual(copy.states["CA"].summary(), index.states["CA"].summary())
+
+    def test_estimate_trip_cost_weights_state_miles(self):
+        index = PriceIndex()
+        index.add_station("a", "AA", 40.5, -100.5, 3.0)
+        index.add_station("b", "BB", 40.5, -99.5, 5.0)
+        # The route crosses from AA's grid cell into BB's.
+        route = [(40.5, -100.9), (40.5, -100.1), (40.5, -99.9), (40.5, -99.1)]
+        profile = get_vehicle_profile("default")
+        estimate = estimate_trip_cost(route, 100.0, profile, index, views.haversine_miles)
+        self.assertEqual(set(estimate["by_state"]), {"AA", "BB"})
+        self.assertEqual(estimate["total_gallons_needed"], 10.0)
+        aa, bb = estimate["by_state"]["AA"], estimate["by_state"]["BB"]
+        self.assertAlmostEqual(aa["miles"] + bb["miles"], 100.0, places=1)
+        expected = (aa["miles"] * 3.0 + bb["miles"] * 5.0) / profile.mpg
+        self.assertAlmostEqual(estimate["estimated_cost_usd"], expected, places=1)
+
+    def test_estimate_requires_prices(self):
+        with self.assertRaises(ValueError):
+            estimate_trip_cost(ROUTE_POINTS, 100.0, get_vehicle_profile(), PriceIndex(), views.haversine_miles)
+
+
+class ImportPricesMixin:
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.csv_path = os.path.join(tmp.name, "prices.csv")
+        patcher = mock.patch.object(pricing, "PRICE_INDEX_PATH", os.path.join(tmp.name, "index.json"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        views._FUEL_DF = None
+        views._DATA_VERSION = None
+        views._DATA_CHECKED_AT = None
+        views._SIMPLE_CACHE.clear()
+        views._PLAN_CACHE.clear()
+        pricing.reset_price_index()
+        self.addCleanup(pricing.reset_price_index)
+
+    def import_prices(self, price):
+        with open(self.csv_path, "w") as f:
+            f.write("station_name,address,city,state,zip_code,latitude,longitude,fuel_price\n")
+            f.write(f"Shell,1 Main St,Reno,NV,89501,39.5296,-119.8138,{price}\n")
+            f.write("BP,2 Main St,Reno,NV,89501,39.5300,-119.8100,4.00\n")
+        call_command("import_fuel_data", self.csv_path, stdout=StringIO())
+
+
+class ImportFuelDataTests(ImportPricesMixin, TestCase):
+
+    def test_reimport_replaces_rows_and_prices(self):
+        self.import_prices("3.00")
+        self.import_prices("5.00")
+        self.assertEqual(FuelStation.objects.count(), 2)
+        index = PriceIndex.load()
+        self.assertEqual(index.states["NV"].prices, [4.0, 5.0])
+
+    def test_price_index_built_from_database(self):
+        self.import_prices("3.00")
+        os.remove(pricing.PRICE_INDEX_PATH)
+        index = pricing.load_price_index()
+        self.assertEqual(set(index.states), {"NV"})
+        self.assertEqual(index.national.count, 2)
+
+    def test_stale_index_file_is_rebuilt(self):
+        self.import_prices("3.00")
+        FuelStation.objects.filter(station_name="Shell").update(fuel_price="2.50")
+        self.assertEqual(pricing.load_price_index().states["NV"].prices, [2.5, 4.0])
+        FuelStation.objects.all().delete()
+        self.assertEqual(pricing.load_price_index().national.count, 51)
+        self.assertEqual(PriceIndex.load().national.count, 51)
+
+
+class LoadFuelDataTests(TestCase):
+
+    def test_csv_fallback_when_table_is_empty(self):
+        df = views.load_fuel_df()
+        self.assertEqual(len(df), 51)
+        self.assertIn("price_per_gallon", df.columns)
+
+    def test_reads_imported_stations(self):
+        FuelStation.objects.create(
+            station_name="Shell", city="Reno", state="NV",
+            latitude=39.5296, longitude=-119.8138, fuel_price=3.999,
+        )
+        df = views.load_fuel_df()
+        self.assertEqual(list(df["station_name"]), ["Shell"])
+        self.assertEqual(df["price_per_gallon"].iloc[0], 3.999)
+
+
+@override_settings(STATION_DATA_CHECK_SECONDS=0)
+@mock.patch.object(views, "call_osrm_route", return_value=(1300 * 1609.344, ROUTE_POINTS))
+@mock.patch.object(views, "geocode", side_effect=fake_geocode)
+class StationDataRefreshTests(ImportPricesMixin, TestCase):
+
+    def route_cost(self):
+        body = {"start": "New York, NY", "end": "Chicago, IL", "geometry": "none"}
+        response = self.client.post("/api/calculate-route/", json.dumps(body), content_type="application/json")
+        return response.json()["total_cost_usd"]
+
+    def nv_min_price(self):
+        return self.client.get("/api/fuel-prices/", {"state": "NV"}).json()["min"]
+
+    def test_import_refreshes_running_worker(self, geocode, osrm):
+        self.import_prices("3.00")
+        cost = self.route_cost()
+        self.assertEqual(self.nv_min_price(), 3.0)
+        self.assertEqual(self.route_cost(), cost)
+
+        self.import_prices("2.00")
+        self.assertEqual(self.nv_min_price(), 2.0)
+        self.assertLess(self.route_cost(), cost)
+
+    def test_station_edit_refreshes_running_worker(self, geocode, osrm):
+        self.import_prices("3.00")
+        self.assertEqual(self.nv_min_price(), 3.0)
+        station = FuelStation.objects.get(station_name="Shell")
+        station.fuel_price = "2.50"
+        station.save()
+        self.assertEqual(self.nv_min_price(), 2.5)
+
+
+@mock.patch.object(views, "call_osrm_route", return_value=(1300 * 1609.344, ROUTE_POINTS))
+@mock.patch.object(views, "geocode", side_effect=fake_geocode)
+class EstimateCostTests(ImportPricesMixin, TestCase):
+
+    def post(self, **body):
+        body = {"start": "New York, NY", "end": "Chicago, IL", **body}
+        return self.client.post("/api/estimate-cost/", json.dumps(body), content_type="application/json")
+
+    def test_estimate_splits_route_miles(self, geocode, osrm):
+        body = self.post(vehicle="semi").json()
+        self.assertEqual(body["vehicle"], "semi")
+        self.assertEqual(body["total_distance_miles"], 1300.0)
+        miles = sum(state["miles"] for state in body["by_state"].values())
+        self.assertAlmostEqual(miles, 1300.0, places=0)
+        self.assertNotIn("unassigned", body["by_state"])
+        cost = sum(state["cost_usd"] for state in body["by_state"].values())
+        self.assertAlmostEqual(body["estimated_cost_usd"], cost, places=0)
+
+    def test_far_from_stations_is_unassigned(self, geocode, osrm):
+        self.import_prices("3.00")
+        body = self.post().json()
+        self.assertEqual(list(body["by_state"]), ["unassigned"])
+        self.assertEqual(body["by_state"]["unassigned"]["avg_price_per_gallon"], 3.5)
+
+    def test_rejects_bad_input(self, geocode, osrm):
+        self.assertEqual(self.post(vehicle="tractor").status_code, 400)
+        self.assertEqual(self.post(end="").status_code, 400)
+        self.assertEqual(self.client.get("/api/estimate-cost/").status_code, 405)
+        geocode.assert_not_called()
+
+
+class FuelOptimizerTests(SimpleTestCase):
+
+    stations = [{"fuel_price": 3.0}, {"fuel_price": 5.0}]
+
+    def test_no_stop_cost_uses_given_prices(self):
+        optimizer = FuelOptimizer(max_range_miles=500, mpg=10)
+        self.assertEqual(optimizer.optimize_fuel_stops([], self.stations, 100), ([], 0))
+        optimizer = FuelOptimizer(max_range_miles=50, mpg=10)
+        self.assertEqual(optimizer.optimize_fuel_stops([], self.stations, 100), ([], 40.0))
+        index = PriceIndex()
+        index.add_station("a", "NV", 39.5, -119.8, 2.0)
+        self.assertEqual(optimizer.optimize_fuel_stops([], self.stations, 100, price_index=index), ([], 20.0))
@@ -9,7 +9,7 @@
 
 # routing/urls.py
 from django.urls import path
-from .views import calculate_route
+from .views import calculate_route, estimate_cost, fuel_prices
 from django.http import JsonResponse
 
 def health(request):
@@ -17,5 +17,7 @@ def health(request):
 
 urlpatterns = [
     path("calculate-route/", calculate_route, name="calculate_route"),
+    path("estimate-cost/", estimate_cost, name="estimate_cost"),
+    path("fuel-prices/", fuel_prices, name="fuel_prices"),
     path("health/", health, name="health"),
 ]
@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+
+DEFAULT_VEHICLE = "default"
+
+
+@dataclass(frozen=True)
+class VehicleProfile:
+    name: str
+    range_miles: float
+    mpg: float
+    tank_capacity_gallons: float = field(init=False)
+    gallons_per_mile: float = field(init=False)
+
+    def __post_init__(self):
+        # Derived once per profile instead of on every request.
+        object.__setattr__(self, "tank_capacity_gallons", self.range_miles / self.mpg)
+        object.__setattr__(self, "gallons_per_mile", 1.0 / self.mpg)
+
+
+VEHICLE_PROFILES = {
+    profile.name: profile
+    for profile in (
+        VehicleProfile(DEFAULT_VEHICLE, range_miles=500.0, mpg=10.0),
+        VehicleProfile("box_truck", range_miles=400.0, mpg=10.0),
+        VehicleProfile("semi", range_miles=1000.0, mpg=6.5),
+    )
+}
+
+
+def get_vehicle_profile(name=None):
+    name = name or DEFAULT_VEHICLE
+    if not isinstance(name, str):
+        raise ValueError("Vehicle profile names must be strings")
+    try:
+        return VEHICLE_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown vehicle profile '{name}'; choose one of {', '.join(VEHICLE_PROFILES)}"
+        ) from None
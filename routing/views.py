@@ -1,23 +1,37 @@
 import os
 import math
 import json
+import threading
+import time
+from collections import OrderedDict
 import requests
-import pandas as pd
+from urllib.parse import urlsplit
 from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
+from .responses import GEOMETRY_FORMATS, route_geometry, route_json_response
+from .models import station_rows
+from .pricing import estimate_trip_cost, get_price_index, reset_price_index, station_source_version
+from .vehicles import get_vehicle_profile
 
+# pandas and geopy are imported on first use so that importing the URLconf
+# (and serving /health/) stays cheap; RoutingConfig.ready() can preload them.
 _SIMPLE_CACHE = {}
+_PLAN_CACHE = OrderedDict()
+_PLAN_CACHE_LOCK = threading.Lock()
+_FUEL_DF = None
+_DATA_VERSION = None
+_DATA_CHECKED_AT = None
+_HTTP_SESSION = None
+_GEOLOCATOR = None
 
 BASE_DIR = settings.BASE_DIR
 FUEL_CSV = os.path.join(BASE_DIR, "sample_fuel_prices.csv")
 OSRM_BASE = os.getenv("OSRM_BASE_URL", "https://router.project-osrm.org")
+NOMINATIM_URL = urlsplit(os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org"))
 
-VEHICLE_RANGE_MILES = 500.0
-MPG = 10.0
-TANK_CAPACITY_GALLONS = VEHICLE_RANGE_MILES / MPG
+VEHICLE_RANGE_MILES = get_vehicle_profile().range_miles
+PLAN_CACHE_SIZE = 1024
 SEARCH_RADIUS_MILES = 10.0
 
 def haversine_miles(lat1, lon1, lat2, lon2):
@@ -28,9 +42,26 @@ def haversine_miles(lat1, lon1, lat2, lon2):
     a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
     return 2 * R * math.asin(math.sqrt(a))
 
+def get_http_session():
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        _HTTP_SESSION = requests.Session()
+    return _HTTP_SESSION
+
+def get_geolocator():
+    global _GEOLOCATOR
+    if _GEOLOCATOR is None:
+        from geopy.geocoders import Nominatim
+        _GEOLOCATOR = Nominatim(
+            user_agent="location_api_bhushan",
+            domain=NOMINATIM_URL.netloc + NOMINATIM_URL.path.rstrip("/"),
+            scheme=NOMINATIM_URL.scheme,
+        )
+    return _GEOLOCATOR
+
 def geocode(address):
-    geolocator = Nominatim(user_agent="location_api_bhushan")
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
+    from geopy.extra.rate_limiter import RateLimiter
+    geocode = RateLimiter(get_geolocator().geocode, min_delay_seconds=1)
     loc = geocode(address)
     if loc is None:
         return None
@@ -40,7 +71,7 @@ def call_osrm_route(start_lat, start_lon, end_lat, end_lon):
     coords = f"{start_lon},{start_lat};{end_lon},{end_lat}"
     url = f"{OSRM_BASE}/route/v1/driving/{coords}"
     params = {"overview": "full", "geometries": "geojson", "steps": "false"}
-    r = requests.get(url, params=params, timeout=20)
+    r = get_http_session().get(url, params=params, timeout=20)
     r.raise_for_status()
     data = r.json()
     routes = data.get("routes", [])
@@ -52,6 +83,11 @@ def call_osrm_route(start_lat, start_lon, end_lat, end_lon):
     route_points = [(pt[1], pt[0]) for pt in geometry]
     return distance_m, route_points
 
+def get_route(cache_key, start_ll, end_ll):
+    if cache_key not in _SIMPLE_CACHE:
+        _SIMPLE_CACHE[cache_key] = call_osrm_route(start_ll[0], start_ll[1], end_ll[0], end_ll[1])
+    return _SIMPLE_CACHE[cache_key]
+
 def points_along_route(route_points, total_miles, segment_miles=VEHICLE_RANGE_MILES):
     points = []
     acc = 0.0
@@ -69,9 +105,15 @@ def points_along_route(route_points, total_miles, segment_miles=VEHICLE_RANGE_MI
     return points
 
 def load_fuel_df():
-    if not os.path.exists(FUEL_CSV):
-        raise FileNotFoundError(f"Fuel CSV not found at {FUEL_CSV}")
-    df = pd.read_csv(FUEL_CSV)
+    import pandas as pd
+    # Imported stations take precedence over the bundled sample CSV.
+    rows = station_rows("station_name", "state", "latitude", "longitude", "fuel_price")
+    if rows:
+        df = pd.DataFrame.from_records(rows)
+    else:
+        if not os.path.exists(FUEL_CSV):
+            raise FileNotFoundError(f"Fuel CSV not found at {FUEL_CSV}")
+        df = pd.read_csv(FUEL_CSV)
     for col in df.columns:
         df.rename(columns={col: col.strip()}, inplace=True)
     df["latitude"] = df["latitude"].astype(float)
@@ -81,6 +123,36 @@ def load_fuel_df():
     df["price_per_gallon"] = df["price_per_gallon"].astype(float)
     return df
 
+def get_fuel_df():
+    global _FUEL_DF
+    if _FUEL_DF is None:
+        _FUEL_DF = load_fuel_df()
+    return _FUEL_DF
+
+def refresh_station_data():
+    # Station data, the price index and cached plans live for the life of the
+    # worker; reload them when the stations table or the sample CSV changes.
+    global _FUEL_DF, _DATA_VERSION, _DATA_CHECKED_AT
+    now = time.monotonic()
+    if _DATA_CHECKED_AT is not None and now - _DATA_CHECKED_AT < settings.STATION_DATA_CHECK_SECONDS:
+        return
+    _DATA_CHECKED_AT = now
+    version = station_source_version()
+    if version != _DATA_VERSION:
+        if _DATA_VERSION is not None:
+            _FUEL_DF = None
+            reset_price_index()
+            with _PLAN_CACHE_LOCK:
+                _PLAN_CACHE.clear()
+        _DATA_VERSION = version
+
+def warm_up():
+    refresh_station_data()
+    get_fuel_df()
+    get_price_index()
+    get_http_session()
+    get_geolocator()
+
 def find_cheapest_near(lat, lon, fuel_df, radius=SEARCH_RADIUS_MILES):
     df = fuel_df.copy()
     df["dist"] = df.apply(lambda r: haversine_miles(lat, lon, r.latitude, r.longitude), axis=1)
@@ -97,16 +169,92 @@ def find_cheapest_near(lat, lon, fuel_df, radius=SEARCH_RADIUS_MILES):
         "distance_from_point_miles": float(row.dist)
     }
 
+def plan_fuel_stops(route_points, distance_miles, end_ll, fuel_df, profile):
+    total_gallons = distance_miles * profile.gallons_per_mile
+    stop_points = points_along_route(route_points, distance_miles, segment_miles=profile.range_miles)
+    fuel_stops = []
+    gallons_remaining = total_gallons
+
+    for idx, p in enumerate(stop_points):
+        lat, lon = p[0], p[1]
+        station = find_cheapest_near(lat, lon, fuel_df)
+        gallons_to_fill = min(profile.tank_capacity_gallons, max(0.0, gallons_remaining))
+        cost = gallons_to_fill * station["price_per_gallon"]
+        fuel_stops.append({
+            "stop_index": idx + 1,
+            "station_name": station["station_name"],
+            "latitude": station["latitude"],
+            "longitude": station["longitude"],
+            "price_per_gallon": round(station["price_per_gallon"], 3),
+            "distance_from_route_point_miles": round(station["distance_from_point_miles"], 3),
+            "gallons_filled": round(gallons_to_fill, 2),
+            "cost_at_this_stop": round(cost, 2)
+        })
+        gallons_remaining -= gallons_to_fill
+        if gallons_remaining <= 0:
+            break
+
+    if not fuel_stops:
+        station = find_cheapest_near(end_ll[0], end_ll[1], fuel_df)
+        gallons_needed = total_gallons
+        fuel_stops.append({
+            "stop_index": 1,
+            "station_name": station["station_name"],
+            "latitude": station["latitude"],
+            "longitude": station["longitude"],
+            "price_per_gallon": round(station["price_per_gallon"], 3),
+            "distance_from_route_point_miles": round(station["distance_from_point_miles"], 3),
+            "gallons_filled": round(gallons_needed, 2),
+            "cost_at_this_stop": round(gallons_needed * station["price_per_gallon"], 2)
+        })
+
+    total_cost = sum(s["cost_at_this_stop"] for s in fuel_stops)
+    return {
+        "vehicle": profile.name,
+        "total_gallons_needed": round(total_gallons, 2),
+        "fuel_stops": fuel_stops,
+        "total_cost_usd": round(total_cost, 2),
+    }
+
+def get_cached_plan(plan_key):
+    with _PLAN_CACHE_LOCK:
+        plan = _PLAN_CACHE.get(plan_key)
+        if plan is not None:
+            _PLAN_CACHE.move_to_end(plan_key)
+        return plan
+
+def cache_plan(plan_key, plan):
+    # LRU: --cold load tests add a new key per request and profile.
+    with _PLAN_CACHE_LOCK:
+        _PLAN_CACHE[plan_key] = plan
+        _PLAN_CACHE.move_to_end(plan_key)
+        while len(_PLAN_CACHE) > PLAN_CACHE_SIZE:
+            _PLAN_CACHE.popitem(last=False)
+
 @csrf_exempt
 def calculate_route(request):
     if request.method != "POST":
         return JsonResponse({"error": "Use POST"}, status=405)
     try:
+        refresh_station_data()
         body = json.loads(request.body)
         start = body.get("start")
         end = body.get("end")
         if not start or not end:
             return JsonResponse({"error": "start & end required"}, status=400)
+        geometry = body.get("geometry", "preview")
+        if geometry not in GEOMETRY_FORMATS:
+            return JsonResponse(
+                {"error": f"geometry must be one of {', '.join(GEOMETRY_FORMATS)}"},
+                status=400,
+            )
+        vehicles = body.get("vehicles")
+        if vehicles is not None and (not isinstance(vehicles, list) or not vehicles):
+            return JsonResponse({"error": "vehicles must be a non-empty list"}, status=400)
+        try:
+            profiles = [get_vehicle_profile(v) for v in (vehicles or [body.get("vehicle")])]
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
         start_ll = geocode(start)
         end_ll = geocode(end)
@@ -114,55 +262,18 @@ def calculate_route(request):
             return JsonResponse({"error": "Geocoding failed for start or end"}, status=400)
 
         cache_key = f"{start}|{end}"
-        if cache_key in _SIMPLE_CACHE:
-            distance_m, route_points = _SIMPLE_CACHE[cache_key]
-        else:
-            distance_m, route_points = call_osrm_route(start_ll[0], start_ll[1], end_ll[0], end_ll[1])
-            _SIMPLE_CACHE[cache_key] = (distance_m, route_points)
-
+        distance_m, route_points = get_route(cache_key, start_ll, end_ll)
         distance_miles = distance_m / 1609.344
-        total_gallons = distance_miles / MPG
-
-        fuel_df = load_fuel_df()
-        stop_points = points_along_route(route_points, distance_miles)
-        fuel_stops = []
-        gallons_remaining = total_gallons
-
-        for idx, p in enumerate(stop_points):
-            lat, lon = p[0], p[1]
-            station = find_cheapest_near(lat, lon, fuel_df)
-            gallons_to_fill = min(TANK_CAPACITY_GALLONS, max(0.0, gallons_remaining))
-            cost = gallons_to_fill * station["price_per_gallon"]
-            fuel_stops.append({
-                "stop_index": idx + 1,
-                "station_name": station["station_name"],
-                "latitude": station["latitude"],
-                "longitude": station["longitude"],
-                "price_per_gallon": round(station["price_per_gallon"], 3),
-                "distance_from_route_point_miles": round(station["distance_from_point_miles"], 3),
-                "gallons_filled": round(gallons_to_fill, 2),
-                "cost_at_this_stop": round(cost, 2)
-            })
-            gallons_remaining -= gallons_to_fill
-            if gallons_remaining <= 0:
-                break
-
-        if not fuel_stops:
-            station = find_cheapest_near(end_ll[0], end_ll[1], fuel_df)
-            gallons_needed = total_gallons
-            fuel_stops.append({
-                "stop_index": 1,
-                "station_name": station["station_name"],
-                "latitude": station["latitude"],
-                "longitude": station["longitude"],
-                "price_per_gallon": round(station["price_per_gallon"], 3),
-                "distance_from_route_point_miles": round(station["distance_from_point_miles"], 3),
-                "gallons_filled": round(gallons_needed, 2),
-                "cost_at_this_stop": round(gallons_needed * station["price_per_gallon"], 2)
-            })
-
-        total_cost = sum(s["cost_at_this_stop"] for s in fuel_stops)
-        preview_points = route_points[:50]
+
+        # The corridor (geocode + OSRM route) is shared; plans are per vehicle.
+        plans = {}
+        for profile in profiles:
+            plan_key = f"{cache_key}|{profile.name}"
+            plan = get_cached_plan(plan_key)
+            if plan is None:
+                plan = plan_fuel_stops(route_points, distance_miles, end_ll, get_fuel_df(), profile)
+                cache_plan(plan_key, plan)
+            plans[profile.name] = plan
 
         resp = {
             "start": start,
@@ -170,11 +281,61 @@ def calculate_route(request):
             "start_latlon": {"lat": start_ll[0], "lon": start_ll[1]},
             "end_latlon": {"lat": end_ll[0], "lon": end_ll[1]},
             "total_distance_miles": round(distance_miles, 2),
-            "total_gallons_needed": round(total_gallons, 2),
-            "fuel_stops": fuel_stops,
-            "total_cost_usd": round(total_cost, 2),
-            "route_coordinates": preview_points
         }
-        return JsonResponse(resp, status=200, safe=False)
+        if vehicles is None:
+            resp.update(plans[profiles[0].name])
+        else:
+            resp["plans"] = plans
+        resp.update(route_geometry(route_points, geometry))
+        return route_json_response(request, resp)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+@csrf_exempt
+def estimate_cost(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Use POST"}, status=405)
+    try:
+        refresh_station_data()
+        body = json.loads(request.body)
+        start = body.get("start")
+        end = body.get("end")
+        if not start or not end:
+            return JsonResponse({"error": "start & end required"}, status=400)
+        try:
+            profile = get_vehicle_profile(body.get("vehicle"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        start_ll = geocode(start)
+        end_ll = geocode(end)
+        if not start_ll or not end_ll:
+            return JsonResponse({"error": "Geocoding failed for start or end"}, status=400)
+
+        distance_m, route_points = get_route(f"{start}|{end}", start_ll, end_ll)
+        distance_miles = distance_m / 1609.344
+        estimate = estimate_trip_cost(route_points, distance_miles, profile, get_price_index(), haversine_miles)
+
+        resp = {
+            "start": start,
+            "end": end,
+            "total_distance_miles": round(distance_miles, 2),
+            **estimate
+        }
+        return route_json_response(request, resp)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+def fuel_prices(request):
+    refresh_station_data()
+    index = get_price_index()
+    state = request.GET.get("state")
+    if state:
+        agg = index.states.get(state.strip().upper())
+        if agg is None:
+            return JsonResponse({"error": f"No prices for state {state}"}, status=404)
+        return JsonResponse({"state": state.strip().upper(), **agg.summary()})
+    return JsonResponse({
+        "national": index.national.summary(),
+        "states": {k: v.summary() for k, v in sorted(index.states.items())},
+    })